@@ -0,0 +1,205 @@
+"""
+Soak test for long-lived workers.
+
+Drives thousands of report generations through the FastAPI app with local
+stand-ins for Tavily and the Cohere chat model, snapshots tracemalloc and RSS
+periodically, and exits non-zero when memory grows past the threshold after
+warm-up. Only the network clients are replaced: every crew, agent executor,
+task callback and checkpoint runs as it does in production.
+
+Usage:
+    python -m scripts.soak_test --iterations 2000 --max-growth-mb 20
+"""
+from typing import Any, Dict, List, Optional
+from unittest import mock
+import argparse
+import copy
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.main import app
+from src.models.schemas import StructuredCompanyReport
+import src.agents.crew as crew_module
+import src.services.tavily_service as tavily_service
+
+
+COMPANIES = ["Vodafone", "Orange", "Telefonica", "Deutsche Telekom", "Verizon", "AT&T"]
+
+
+class StubTavilyClient:
+    """Local stand-in for TavilyClient returning a fixed-shape search payload"""
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+    def search(self, query: str, max_results: int = 5, include_answer: bool = True) -> Dict[str, Any]:
+        return {
+            "answer": f"Summary for query: {query}",
+            "results": [
+                {
+                    "title": f"Result {i} for {query}",
+                    "content": f"Content {i} about {query}. " * 20,
+                    "url": f"https://example.com/{i}"
+                }
+                for i in range(max_results)
+            ]
+        }
+
+
+class StubChatCohere(BaseChatModel):
+    """Local stand-in for ChatCohere: answers each agent prompt straight away, the writer with a valid report JSON"""
+
+    model: str = "stub"
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-cohere"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        if "JSON Report Generator" in prompt:
+            report = copy.deepcopy(StructuredCompanyReport.model_config["json_schema_extra"]["example"])
+            for company in COMPANIES:
+                if f"JSON for {company} " in prompt:
+                    report["company_name"] = company
+                    break
+            answer = json.dumps(report)
+        else:
+            answer = f"Notes from {len(prompt)} characters of input."
+        content = f"Thought: I now know the final answer\nFinal Answer: {answer}"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB, falling back to peak RSS off Linux"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def traced_mb() -> float:
+    return tracemalloc.get_traced_memory()[0] / (1024 * 1024)
+
+
+def run_iteration(client: TestClient, iteration: int, tenants: int) -> None:
+    """Set keys for a rotating tenant and generate one report"""
+    tenant = iteration % tenants
+    response = client.post("/api/keys/set", json={
+        "cohere_api_key": f"soak-cohere-{tenant}",
+        "tavily_api_key": f"soak-tavily-{tenant}"
+    })
+    response.raise_for_status()
+
+    response = client.post("/api/report/generate", json={
+        "company_name": COMPANIES[iteration % len(COMPANIES)],
+        "company_link": None
+    })
+    response.raise_for_status()
+
+
+def print_top_sites(baseline: tracemalloc.Snapshot, current: tracemalloc.Snapshot, top: int) -> None:
+    stats = current.compare_to(baseline, "lineno")
+    print(f"\n[SOAK] Top {top} allocation sites by growth since baseline:")
+    for stat in stats[:top]:
+        print(f"  {stat}")
+
+
+def run_soak(iterations: int, warmup: int, snapshot_every: int, tenants: int,
+             max_growth_mb: float, top: int, frames: int) -> bool:
+    """Run the soak loop and return True when memory stayed within the threshold"""
+    tracemalloc.start(frames)
+    baseline: Optional[tracemalloc.Snapshot] = None
+    baseline_traced = baseline_rss = 0.0
+    samples: List[Dict[str, float]] = []
+    started = time.perf_counter()
+
+    with mock.patch.object(tavily_service, "TavilyClient", StubTavilyClient), \
+            mock.patch.object(crew_module, "ChatCohere", StubChatCohere), \
+            TestClient(app) as client:
+        for iteration in range(1, iterations + 1):
+            run_iteration(client, iteration, tenants)
+
+            if iteration == warmup:
+                baseline = tracemalloc.take_snapshot()
+                baseline_traced, baseline_rss = traced_mb(), rss_mb()
+                print(f"[SOAK] Baseline after {warmup} warm-up runs: "
+                      f"traced={baseline_traced:.1f}MB rss={baseline_rss:.1f}MB")
+
+            if iteration % snapshot_every == 0:
+                sample = {"iteration": iteration, "traced_mb": traced_mb(), "rss_mb": rss_mb()}
+                samples.append(sample)
+                elapsed = time.perf_counter() - started
+                print(f"[SOAK] {iteration}/{iterations} traced={sample['traced_mb']:.1f}MB "
+                      f"rss={sample['rss_mb']:.1f}MB ({iteration / elapsed:.1f} runs/s)")
+
+        final = tracemalloc.take_snapshot()
+
+    if baseline is None:
+        baseline = final
+        baseline_traced, baseline_rss = traced_mb(), rss_mb()
+
+    traced_growth = traced_mb() - baseline_traced
+    rss_growth = rss_mb() - baseline_rss
+    asset_dirs = len(os.listdir("src/assets")) if os.path.isdir("src/assets") else 0
+    tracemalloc.stop()
+
+    print(f"\n[SOAK] Growth since baseline: traced={traced_growth:+.2f}MB rss={rss_growth:+.2f}MB")
+    print(f"[SOAK] Asset directories on disk: {asset_dirs}")
+    print_top_sites(baseline, final, top)
+
+    passed = traced_growth <= max_growth_mb and rss_growth <= max_growth_mb
+    print(f"\n[SOAK] {'PASS' if passed else 'FAIL'} (threshold {max_growth_mb}MB)")
+    return passed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Memory soak test for report generation")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100, help="Runs before the baseline snapshot")
+    parser.add_argument("--snapshot-every", type=int, default=100)
+    parser.add_argument("--tenants", type=int, default=50, help="Distinct API key pairs to rotate")
+    parser.add_argument("--max-growth-mb", type=float, default=20.0)
+    parser.add_argument("--top", type=int, default=15, help="Allocation sites to report")
+    parser.add_argument("--frames", type=int, default=1, help="tracemalloc traceback depth")
+    parser.add_argument("--keep-assets", action="store_true",
+                        help="Write report assets into the repo instead of a temp dir")
+    args = parser.parse_args()
+
+    workdir = REPO_ROOT if args.keep_assets else tempfile.mkdtemp(prefix="soak_")
+    os.chdir(workdir)
+    print(f"[SOAK] Working directory: {workdir}")
+
+    passed = run_soak(
+        iterations=args.iterations,
+        warmup=min(args.warmup, args.iterations),
+        snapshot_every=args.snapshot_every,
+        tenants=args.tenants,
+        max_growth_mb=args.max_growth_mb,
+        top=args.top,
+        frames=args.frames
+    )
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 from crewai import Agent, Task
 from langchain_cohere import ChatCohere
+from src.config import settings
 
 
 class AnalysisAgent:
@@ -15,12 +16,20 @@ class AnalysisAgent:
             goal="Transform company research into organized, detailed structured information",
             backstory="Expert at organizing and structuring business information for professional reports.",
             llm=self.llm,
-            verbose=True,
+            verbose=settings.crew_verbose,
             allow_delegation=False
         )
     
-    def create_task(self, agent: Agent, research_findings: str) -> Task:
+    def create_task(self, agent: Agent, research_findings: str, include_industry: bool = True) -> Task:
         """Create analysis task for structuring data"""
+        if include_industry:
+            industry_section = """**INDUSTRY ANALYSIS:**
+- Market Landscape: [Industry description]
+- Main Competitors: [List competitors]
+- Market Challenges: [Challenges in the industry]"""
+        else:
+            industry_section = """**INDUSTRY ANALYSIS:** Skip - shared industry research is supplied separately"""
+        
         return Task(
             description=f"""Organize and structure this research data into detailed categories:
 
@@ -37,10 +46,7 @@ Create detailed information organized as follows:
 - Business Model: [How they make money]
 - Funding & Investment: [Investment details]
 
-**INDUSTRY ANALYSIS:**
-- Market Landscape: [Industry description]
-- Main Competitors: [List competitors]
-- Market Challenges: [Challenges in the industry]
+{industry_section}
 
 **FINANCIAL INFORMATION:**
 - Revenue Model: [How revenue is generated]
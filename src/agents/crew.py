@@ -1,104 +1,392 @@
-from crewai import Crew
+from crewai import Agent, Crew
 from langchain_cohere import ChatCohere
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Optional
 import json
 import os
-from datetime import datetime
+import time
 from .research_agent import ResearchAgent
 from .analysis_agent import AnalysisAgent
 from .writer_agent import WriterAgent
+from src.config import settings
+from src.services.checkpoint_store import CheckpointStore
+from src.services.entity_resolver import company_slug
+from src.services.deadline import Deadline, DeadlineExceeded
+from src.services.profiler import profile_stage, set_stage
+from src.services.stage_stats import stage_stats
+from src.logger import get_logger
+import contextvars
 import random, string
 
 
+logger = get_logger(__name__)
+
+
+STAGES = ("research", "analysis", "writer")
+
+
+def task_output_text(output) -> str:
+    """Raw text of a task output across CrewAI versions (raw_output, raw, or plain strings)"""
+    for attribute in ("raw_output", "raw"):
+        text = getattr(output, attribute, None)
+        if isinstance(text, str):
+            return text
+    return str(output)
+
+
+def resolve_stage_models(model_id: Optional[str] = None, stage_models: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Model per stage: config defaults, then a single model_id for all stages, then per-stage overrides"""
+    models = {
+        "research": settings.research_model,
+        "analysis": settings.analysis_model,
+        "writer": settings.writer_model
+    }
+    if model_id:
+        models = {stage: model_id for stage in STAGES}
+    for stage, model in (stage_models or {}).items():
+        if stage in models and model:
+            models[stage] = model
+    return models
+
+
 class CompanyReportCrew:
     """Orchestrates multiple AI agents to generate comprehensive company reports"""
     
-    def __init__(self, cohere_api_key: str, agentops_api_key: str = None, model_id: str = "command-a-03-2025"):
-        """Initialize crew with LLM and agent instances, create assets directory"""
+    def __init__(self, cohere_api_key: str, agentops_api_key: str = None, model_id: Optional[str] = None,
+                 stage_models: Optional[Dict[str, str]] = None):
+        """Initialize crew with per-stage LLMs and agent instances, create assets directory"""
         
         if not cohere_api_key or cohere_api_key.strip() == "":
             raise ValueError("Cohere API key is required and cannot be empty")
         
         os.environ["COHERE_API_KEY"] = cohere_api_key
         
-        self.llm = ChatCohere(model=model_id)
+        self.stage_models = resolve_stage_models(model_id, stage_models)
+        self._llms: Dict[str, ChatCohere] = {}
         
-        self.research_agent_class = ResearchAgent(self.llm)
-        self.analysis_agent_class = AnalysisAgent(self.llm)
-        self.writer_agent_class = WriterAgent(self.llm)
+        self.research_agent_class = ResearchAgent(self.get_llm(self.stage_models["research"]))
+        self.analysis_agent_class = AnalysisAgent(self.get_llm(self.stage_models["analysis"]))
+        self.writer_agent_class = WriterAgent(self.get_llm(self.stage_models["writer"]))
+        self.llm = self.writer_agent_class.llm
+        
+        self.analysis_output: Optional[str] = None
+        self.report_dir: Optional[str] = None
+        self.include_industry = True
         
         self.output_dir = "src/assets"
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
-          
+        
+        self.checkpoints = CheckpointStore(
+            base_dir=os.path.join(self.output_dir, "checkpoints"),
+            ttl_hours=settings.checkpoint_ttl_hours
+        )
     
+    def get_llm(self, model_id: str) -> ChatCohere:
+        """Return one ChatCohere per model so stages sharing a model share a client"""
+        if model_id not in self._llms:
+            self._llms[model_id] = ChatCohere(model=model_id)
+        return self._llms[model_id]
     
-    def generate_report(self, company_name: str, company_data: str) -> str:
-        """Execute crew pipeline with three agents and save outputs to assets folder"""
+    def set_stage_models(self, stage_models: Dict[str, str]):
+        """Move stages onto other models; later runs and their checkpoint keys use the new ones"""
+        self.stage_models.update(stage_models)
+        self.research_agent_class = ResearchAgent(self.get_llm(self.stage_models["research"]))
+        self.analysis_agent_class = AnalysisAgent(self.get_llm(self.stage_models["analysis"]))
+        self.writer_agent_class = WriterAgent(self.get_llm(self.stage_models["writer"]))
+        self.llm = self.writer_agent_class.llm
+    
+    def create_report_dir(self, company_id: str) -> str:
+        """Create this run's asset directory so stage outputs can be saved as they complete"""
+        self.report_dir = os.path.join(self.output_dir, f"{company_id}_{self.generate_random_string()}")
+        
+        if not os.path.exists(self.report_dir):
+            os.makedirs(self.report_dir)
+        return self.report_dir
+    
+    def generate_report(self, company_name: str, company_data: str, deadline: Optional[Deadline] = None,
+                        include_industry: bool = True) -> str:
+        """Run the stages not already checkpointed for these inputs, saving each output as it completes"""
+        self.include_industry = include_industry
         try:
-            print(f"## CREW Starting crew execution for {company_name}")
+            logger.info("Starting crew execution", extra={"company": company_name, "models": self.stage_models})
             
-            research_agent = self.research_agent_class.create_agent()
-            analysis_agent = self.analysis_agent_class.create_agent()
-            writer_agent = self.writer_agent_class.create_agent()
+            if self.report_dir is None:
+                self.create_report_dir(company_slug(company_name))
             
-            research_task = self.research_agent_class.create_task(research_agent, company_data)
-            analysis_task = self.analysis_agent_class.create_task(analysis_agent, research_task.output)
-            report_task = self.writer_agent_class.create_task(writer_agent, company_name, analysis_task.output)
+            # Resume from the first stage without a checkpoint for its exact inputs
+            outputs: Dict[str, str] = {}
+            for stage in ("research", "analysis"):
+                cached = self.checkpoints.get(stage, self._stage_inputs(stage, company_data, outputs))
+                if cached is None:
+                    break
+                outputs[stage] = cached
+                self._save_stage_output(stage, company_name, cached)
             
-            crew = Crew(
-                agents=[research_agent, analysis_agent, writer_agent],
-                tasks=[research_task, analysis_task, report_task],
-                verbose=True
-            )
+            # Under a deadline, research and analysis run as their own crew and give up early enough
+            # to leave the writer its reserved time; the writer then works from whatever finished
+            split = deadline is not None and deadline.enabled
+            stage_deadline = deadline
+            if split:
+                stage_deadline = deadline.shortened(settings.deadline_writer_reserve_ms / 1000)
+            
+            agents, tasks, descriptions, upstream_tasks = [], [], {}, {}
+            started_at: Dict[str, float] = {}
+            finished_at: Dict[str, float] = {}
+            
+            if "research" not in outputs:
+                research_agent = self._stage_agent(self.research_agent_class.create_agent(), "research", stage_deadline, started_at)
+                research_task = self.research_agent_class.create_task(research_agent, company_data, include_industry)
+                agents.append(research_agent)
+                tasks.append(research_task)
+                descriptions["research"] = research_task.description
+                upstream_tasks["research"] = research_task
+            
+            if "analysis" not in outputs:
+                research_input = outputs["research"] if "research" in outputs else research_task.output
+                analysis_agent = self._stage_agent(self.analysis_agent_class.create_agent(), "analysis", stage_deadline, started_at)
+                analysis_task = self.analysis_agent_class.create_task(analysis_agent, research_input, include_industry)
+                agents.append(analysis_agent)
+                tasks.append(analysis_task)
+                descriptions["analysis"] = analysis_task.description
+                upstream_tasks["analysis"] = analysis_task
+            
+            def complete_stage(stage: str, output):
+                outputs[stage] = task_output_text(output)
+                self.checkpoints.put(stage, self._stage_inputs(stage, company_data, outputs), outputs[stage])
+                self._save_stage_output(stage, company_name, outputs[stage])
+            
+            def on_task_done(output):
+                # CrewAI replaces per-task callbacks with the crew's task_callback at kickoff, so
+                # this one crew-wide callback matches the finished task by its description
+                stage = next((stage for stage, description in descriptions.items()
+                              if description == getattr(output, "description", None)), None)
+                if stage is None:
+                    return
+                finished_at[stage] = time.perf_counter()
+                if stage in upstream_tasks:
+                    complete_stage(stage, output)
+            
+            def collect_outputs():
+                """Checkpoint finished tasks whose completion wasn't seen, e.g. when a later task raised"""
+                for stage, task in upstream_tasks.items():
+                    if stage not in outputs and task.output is not None:
+                        complete_stage(stage, task.output)
+            
+            first_stage = next((stage for stage in STAGES if stage in descriptions), "writer")
+            
+            if split:
+                if tasks:
+                    upstream = self._crew(agents, tasks, stage_deadline, started_at, on_task_done)
+                    try:
+                        self._kickoff(upstream, first_stage, stage_deadline, finished_at)
+                    except DeadlineExceeded as e:
+                        logger.warning("%s, writing from the stages that finished", e, extra={"company": company_name})
+                    finally:
+                        collect_outputs()
+                writer_input = outputs.get("analysis") or outputs.get("research") or company_data
+                agents, tasks, first_stage = [], [], "writer"
+            else:
+                writer_input = outputs["analysis"] if "analysis" in outputs else analysis_task.output
+            
+            writer_agent = self._stage_agent(self.writer_agent_class.create_agent(), "writer", deadline, started_at)
+            report_task = self.writer_agent_class.create_task(writer_agent, company_name, writer_input, include_industry)
+            agents.append(writer_agent)
+            tasks.append(report_task)
+            descriptions["writer"] = report_task.description
+            
+            crew = self._crew(agents, tasks, deadline, started_at, on_task_done)
+            try:
+                result = self._kickoff(crew, first_stage, deadline, None if split else finished_at)
+            finally:
+                collect_outputs()
+            finished_at.setdefault("writer", time.perf_counter())
             
-            result = crew.kickoff()
             report_text = str(result) if result else ""
             
             if not report_text or report_text.strip() == "":
                 report_text = f"# {company_name}\n\nReport generation completed."
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            
-            self.report_dir = os.path.join(self.output_dir, f"{company_name}_{self.generate_random_string()}") 
+            outputs["writer"] = report_text
+            self.analysis_output = outputs.get("analysis")
+            self._record_stage_stats(started_at, finished_at, inputs=descriptions, outputs=outputs)
             
-            if not os.path.exists(self.report_dir):
-                os.makedirs(self.report_dir)
-                
-            research_data = {
-                "agent": "research_agent",
-                "company": company_name,
-                "output": str(research_task.output)
-            }
-            with open(f"{self.report_dir}/research.json", "w") as f:
-                json.dump(research_data, f, indent=2)
-            print(f"## CREW Saved research_agent output to src/assets/")
-            
-            analysis_data = {
-                "agent": "analysis_agent",
-                "company": company_name,
-                "output": str(analysis_task.output)
-            }
-            with open(f"{self.report_dir}/analysis.json", "w") as f:
-                json.dump(analysis_data, f, indent=2)
-            print(f"## CREW Saved analysis_agent output to src/assets/")
-            
-            writer_data = {
-                "agent": "writer_agent",
-                "company": company_name,
-                "output": report_text
-            }
-            with open(f"{self.report_dir}/writer.json", "w") as f:
-                json.dump(writer_data, f, indent=2)
-            print(f"## CREW Saved writer_agent output to src/assets/")
+            self._save_stage_output("writer", company_name, report_text)
             
-            print(f"## CREW Crew execution completed successfully for {company_name}")
+            logger.info("Crew execution completed", extra={"company": company_name})
             
             return report_text
-            
+        
+        except DeadlineExceeded as e:
+            logger.warning(str(e), extra={"company": company_name})
+            raise
         except Exception as e:
-            print(f"## CREW ERROR {str(e)}")
+            logger.error("Crew execution failed: %s", e, extra={"company": company_name})
             raise Exception(f"Crew execution error: {str(e)}")
     
+    def load_run(self, report_id: str) -> dict:
+        """Point this crew at an earlier run's directory and load its saved analysis and sources"""
+        if not report_id or os.path.basename(report_id) != report_id:
+            raise ValueError(f"Invalid report id: {report_id}")
+        
+        report_dir = os.path.join(self.output_dir, report_id)
+        analysis_path = os.path.join(report_dir, "analysis.json")
+        if not os.path.exists(analysis_path):
+            raise FileNotFoundError(f"No analysis output saved for run {report_id}")
+        
+        with open(analysis_path, "r") as f:
+            analysis_data = json.load(f)
+        
+        search_data = {}
+        search_path = os.path.join(report_dir, "search.json")
+        if os.path.exists(search_path):
+            with open(search_path, "r") as f:
+                search_data = json.load(f)
+        
+        self.report_dir = report_dir
+        self.analysis_output = analysis_data.get("output")
+        self.include_industry = search_data.get("include_industry", True)
+        return {
+            "company_name": analysis_data.get("company") or report_id.rsplit("_", 1)[0],
+            "sources": search_data.get("sources", []),
+            "sector": search_data.get("sector"),
+            "company_id": search_data.get("company_id")
+        }
+    
+    def save_search_output(self, company_name: str, company_details: dict, sector: Optional[str] = None,
+                           include_industry: bool = True, company_id: Optional[str] = None,
+                           company_link: Optional[str] = None):
+        """Save the search stage's content and sources into this run's directory"""
+        search_data = {
+            "company": company_name,
+            "company_id": company_id,
+            "company_link": company_link,
+            "sector": sector,
+            "include_industry": include_industry,
+            "sources": company_details.get("sources", []),
+            "raw_content": company_details.get("raw_content", "")
+        }
+        with open(f"{self.report_dir}/search.json", "w") as f:
+            json.dump(search_data, f, indent=2)
+    
+    def rewrite_report(self, company_name: str, model_id: str, deadline: Optional[Deadline] = None) -> str:
+        """Re-run only the writer stage on the last analysis output with a different model"""
+        if self.analysis_output is None:
+            raise ValueError("No analysis output available to rewrite")
+        
+        logger.info("Re-running writer stage", extra={"company": company_name, "model": model_id})
+        writer_agent_class = WriterAgent(self.get_llm(model_id))
+        stage_started: Dict[str, float] = {}
+        writer_agent = self._stage_agent(writer_agent_class.create_agent(), "writer", deadline, stage_started)
+        report_task = writer_agent_class.create_task(
+            writer_agent, company_name, self.analysis_output, self.include_industry
+        )
+        
+        crew = self._crew([writer_agent], [report_task], deadline, stage_started)
+        
+        started_at = time.perf_counter()
+        result = self._kickoff(crew, "writer", deadline)
+        latency = time.perf_counter() - started_at
+        
+        report_text = str(result) if result else ""
+        stage_stats.record("writer", model_id, latency, report_task.description, report_text)
+        
+        self.stage_models["writer"] = model_id
+        self._save_stage_output("writer", company_name, report_text, model_id)
+        return report_text
+    
+    def _stage_agent(self, agent: Agent, stage: str, deadline: Optional[Deadline], started_at: Dict[str, float]) -> Agent:
+        """Hook the agent's task execution so its stage starts with a deadline check and profiler attribution"""
+        execute_task = agent.execute_task
+        
+        def execute_task_in_stage(*args, **kwargs):
+            if deadline:
+                deadline.check(stage, settings.deadline_margin_ms / 1000)
+            started_at[stage] = time.perf_counter()
+            set_stage(stage)
+            return execute_task(*args, **kwargs)
+        
+        # Agent is a pydantic model; shadow the method on this instance without field validation
+        object.__setattr__(agent, "execute_task", execute_task_in_stage)
+        return agent
+    
+    def _crew(self, agents: list, tasks: list, deadline: Optional[Deadline], started_at: Dict[str, float],
+              task_callback=None) -> Crew:
+        """Crew that stops at the next agent step once its deadline is cancelled, so abandoned runs stop spending calls"""
+        def step_callback(step):
+            if deadline is not None and deadline.cancelled:
+                raise DeadlineExceeded(max(started_at, key=started_at.get) if started_at else "crew")
+        
+        return Crew(
+            agents=agents,
+            tasks=tasks,
+            verbose=settings.crew_verbose,
+            task_callback=task_callback,
+            step_callback=step_callback
+        )
+    
+    def _kickoff(self, crew: Crew, first_stage: str, deadline: Optional[Deadline] = None,
+                 finished_at: Optional[Dict[str, float]] = None):
+        """Run the crew, on a worker thread bounded by the deadline when one is set"""
+        if deadline is None or not deadline.enabled:
+            with profile_stage(first_stage):
+                return crew.kickoff()
+        
+        deadline.check(first_stage, settings.deadline_margin_ms / 1000)
+        
+        def run():
+            with profile_stage(first_stage):
+                return crew.kickoff()
+        
+        executor = ThreadPoolExecutor(max_workers=1)
+        # Carry the request id (and other context) onto the worker thread
+        future = executor.submit(contextvars.copy_context().run, run)
+        executor.shutdown(wait=False)
+        try:
+            return future.result(timeout=deadline.remaining())
+        except FutureTimeoutError:
+            # The running task can't be interrupted; cancelling makes the next task callback abort the crew
+            deadline.cancel()
+            running = first_stage
+            if finished_at is not None:
+                running = next((stage for stage in STAGES if stage not in finished_at), first_stage)
+            raise DeadlineExceeded(running)
+    
+    def _record_stage_stats(self, started_at: Dict[str, float], finished_at: Dict[str, float],
+                            inputs: Dict[str, str], outputs: Dict[str, str]):
+        """Record per-stage latency and token estimates from each task's start and completion times"""
+        for stage in STAGES:
+            if stage not in started_at or stage not in finished_at or stage not in outputs:
+                continue
+            stage_stats.record(
+                stage, self.stage_models[stage], finished_at[stage] - started_at[stage],
+                inputs[stage], outputs[stage]
+            )
+    
+    def _stage_inputs(self, stage: str, company_data: str, outputs: Dict[str, str]) -> dict:
+        """Everything a stage's output depends on; hashed to key its checkpoint"""
+        if stage == "research":
+            return {
+                "model": self.stage_models["research"],
+                "company_data": company_data,
+                "include_industry": self.include_industry
+            }
+        return {
+            "model": self.stage_models["analysis"],
+            "research": outputs.get("research"),
+            "include_industry": self.include_industry
+        }
+    
+    def _save_stage_output(self, stage: str, company_name: str, output: str, model_id: Optional[str] = None):
+        stage_data = {
+            "agent": f"{stage}_agent",
+            "company": company_name,
+            "model": model_id or self.stage_models[stage],
+            "output": output
+        }
+        with open(f"{self.report_dir}/{stage}.json", "w") as f:
+            json.dump(stage_data, f, indent=2)
+        logger.debug("Saved %s_agent output", stage, extra={"report_dir": self.report_dir})
+    
     def generate_random_string(self, length : int=12):
-      return ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
\ No newline at end of file
+      return ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
@@ -1,5 +1,6 @@
 from crewai import Agent, Task
 from langchain_cohere import ChatCohere
+from src.config import settings
 
 
 class ResearchAgent:
@@ -14,12 +15,21 @@ class ResearchAgent:
             goal="Extract and organize ALL specific information about companies from research data",
             backstory="An expert analyst specializing in company research. You extract specific details from documents and organize them precisely.",
             llm=self.llm,
-            verbose=True,
+            verbose=settings.crew_verbose,
             allow_delegation=False
         )
     
-    def create_task(self, agent: Agent, company_data: str) -> Task:
+    def create_task(self, agent: Agent, company_data: str, include_industry: bool = True) -> Task:
         """Company Research Task"""
+        if include_industry:
+            industry_items = """8. MARKET LANDSCAPE: Description of the industry/market
+
+9. COMPETITORS: Name specific competitors
+
+10. MARKET CHALLENGES: What challenges exist in the market"""
+        else:
+            industry_items = """8-10. SKIP market landscape, competitors and market challenges - shared industry research is supplied separately"""
+        
         task = Task(
             description=f"""Extract ALL specific information from this company data:
 
@@ -44,11 +54,7 @@ Extract EXACTLY these details:
 
 7. FUNDING: Investment and funding information
 
-8. MARKET LANDSCAPE: Description of the industry/market
-
-9. COMPETITORS: Name specific competitors
-
-10. MARKET CHALLENGES: What challenges exist in the market
+{industry_items}
 
 11. FINANCIAL INFO: Revenue figures, growth rates, metrics
     - Extract: Revenue amounts, growth percentages, key financial metrics
@@ -1,5 +1,6 @@
 from crewai import Agent, Task
 from langchain_cohere import ChatCohere
+from src.config import settings
 from src.models.schemas import StructuredCompanyReport
 import json
 
@@ -17,13 +18,17 @@ class WriterAgent:
             goal="Convert detailed company analysis into perfectly structured JSON matching the schema",
             backstory="Expert at creating well-formatted JSON reports with accurate data mapping.",
             llm=self.llm,
-            verbose=True,
+            verbose=settings.crew_verbose,
             allow_delegation=False
         )
     
-    def create_task(self, agent: Agent, company_name: str, analysis: str) -> Task:
+    def create_task(self, agent: Agent, company_name: str, analysis: str, include_industry: bool = True) -> Task:
         """Create task to generate JSON structured report matching Pydantic schema exactly"""
         
+        industry_note = "" if include_industry else """
+Set "industry" to null - it is filled in from shared industry research.
+"""
+        
         schema = json.dumps(StructuredCompanyReport.model_json_schema(), indent=2)
         example = json.dumps(StructuredCompanyReport.model_config.get('json_schema_extra', {}).get('example'), indent=2)
         
@@ -39,7 +44,7 @@ Follow EXACTLY this Pydantic schema structure:
 Use this example as reference for formatting:
 
 {example}
-
+{industry_note}
 Generate ONLY valid JSON output - no markdown, no explanations, no code blocks.
 Start with opening brace and end with closing brace.""",
             agent=agent,
@@ -11,6 +11,38 @@ class Settings(BaseSettings):
     app_version: str = "0.1.0"
     debug: Optional[bool] = False
     
+    # Logging: "json" or "text" records; crew_verbose turns on CrewAI's full prompt tracing
+    log_level: str = "INFO"
+    log_format: str = "json"
+    crew_verbose: bool = False
+    
+    # Cohere model per crew stage; with adaptive routing on, a report that fails validation
+    # is regenerated with every stage not already on fallback_model moved onto it
+    research_model: str = "command-r7b-12-2024"
+    analysis_model: str = "command-r-08-2024"
+    writer_model: str = "command-a-03-2025"
+    fallback_model: str = "command-a-03-2025"
+    adaptive_model_routing: bool = True
+    
+    # Stages that would start with less than this left before a request deadline are skipped
+    deadline_margin_ms: int = 1000
+    # Under a deadline, research and analysis stop early enough to leave the writer this long
+    deadline_writer_reserve_ms: int = 15000
+    
+    # Search, research and analysis outputs are reused for identical inputs within this window
+    checkpoint_ttl_hours: float = 24.0
+    
+    # Industry sections are shared across companies in the same sector for this long
+    industry_cache_enabled: bool = True
+    industry_cache_ttl_hours: float = 168.0
+    
+    gzip_minimum_size: int = 1000
+    
+    # Sampling profiler endpoints stay disabled unless a token is set
+    debug_profiler_token: Optional[str] = None
+    profiler_interval_ms: float = 10.0
+    profiler_max_seconds: float = 60.0
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
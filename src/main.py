@@ -1,17 +1,50 @@
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import os
+import uuid
 
-from src.routes import base, keys, reports
+from src.routes import base, debug, keys, reports
 from src.config import settings
+from src.logger import request_id_var, setup_logging, shutdown_logging
+from src.services.static_assets import CachedStaticFiles, static_manifest
+
+setup_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Hash and precompress static assets once per process
+    static_manifest.build()
+    yield
+    shutdown_logging()
+
 
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan
 )
 
+# Compress JSON/HTML responses; precompressed static files pass through untouched
+app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_minimum_size)
+
+
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    """Tag every log record emitted while handling the request with its id"""
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -23,12 +56,13 @@ app.add_middleware(
 
 # Mount static files
 if os.path.exists("static"):
-    app.mount("/static", StaticFiles(directory="static"), name="static")
+    app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
 # Include routers
 app.include_router(base.router)
 app.include_router(keys.router)
 app.include_router(reports.router)
+app.include_router(debug.router)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from typing import List, Optional, Tuple
 
 
 class Leader(BaseModel):
@@ -188,6 +188,30 @@ class StructuredCompanyReport(BaseModel):
             }
         )
 
+    @classmethod
+    def from_partial(cls, company_name: str, report_data: Optional[dict]) -> Tuple["StructuredCompanyReport", List[str]]:
+        """Validate each section on its own, filling only missing or invalid ones from create_fallback"""
+        report_data = report_data if isinstance(report_data, dict) else {}
+        fallback = cls.create_fallback(company_name)
+        sections = {}
+        missing_sections = []
+        
+        for field_name, section_model in (
+            ("overview", CompanyOverview),
+            ("industry", IndustryOverview),
+            ("financials", FinancialOverview),
+            ("news", NewsSection),
+            ("references", ReferencesSection)
+        ):
+            try:
+                sections[field_name] = section_model.model_validate(report_data.get(field_name))
+            except ValidationError:
+                sections[field_name] = getattr(fallback, field_name)
+                missing_sections.append(field_name)
+        
+        report = cls(company_name=report_data.get("company_name") or company_name, **sections)
+        return report, missing_sections
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -233,4 +257,9 @@ class StructuredCompanyReport(BaseModel):
 class CompanyReportResponse(BaseModel):
     """Response model for company report generation"""
     company_name: str
-    report: StructuredCompanyReport
\ No newline at end of file
+    report: StructuredCompanyReport
+    company_id: Optional[str] = None
+    report_id: Optional[str] = None
+    report_hash: Optional[str] = None
+    partial: bool = False
+    missing_sections: List[str] = Field(default_factory=list)
\ No newline at end of file
@@ -1,17 +1,42 @@
-from fastapi import APIRouter
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Request
+from fastapi.responses import Response
+import hashlib
 import os
 
 from src.config import settings
+from src.services.static_assets import static_manifest
 
 router = APIRouter()
 
+INDEX_TEMPLATE = "templates/index.html"
+
+# Rendered index page cached by template mtime: (mtime, body, etag)
+_index_cache = {}
+
+
+def _render_index():
+    """Render index.html with content-hashed static URLs, re-reading only when it changes"""
+    mtime = os.path.getmtime(INDEX_TEMPLATE)
+    if _index_cache.get("mtime") != mtime:
+        with open(INDEX_TEMPLATE, "r", encoding="utf-8") as f:
+            body = static_manifest.rewrite_html(f.read()).encode("utf-8")
+        _index_cache.update(
+            mtime=mtime,
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        )
+    return _index_cache["body"], _index_cache["etag"]
+
 
 @router.get("/")
-async def root():
+async def root(request: Request):
     """Serve the main HTML page"""
-    if os.path.exists("templates/index.html"):
-        return FileResponse("templates/index.html", media_type="text/html")
+    if os.path.exists(INDEX_TEMPLATE):
+        body, etag = _render_index()
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="text/html", headers=headers)
     return {"message": "Company Report Generator API"}
 
 
@@ -22,4 +47,4 @@ async def health_check():
         "status": "healthy",
         "app_name": settings.app_name,
         "version": settings.app_version
-    }
\ No newline at end of file
+    }
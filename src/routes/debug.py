@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+from typing import Literal, Optional
+import asyncio
+import hmac
+
+from src.config import settings
+from src.services.profiler import SamplingProfiler, profile_results
+
+router = APIRouter(prefix="/api/debug", tags=["debug"])
+
+ProfileFormat = Literal["collapsed", "speedscope"]
+
+
+def verify_debug_token(token: Optional[str]):
+    """Debug endpoints only exist when a token is configured and the caller presents it"""
+    if not settings.debug_profiler_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not hmac.compare_digest(token, settings.debug_profiler_token):
+        raise HTTPException(status_code=403, detail="Invalid debug token")
+
+
+def profile_response(output_format: str, result):
+    if output_format == "speedscope":
+        return JSONResponse(content=result)
+    return PlainTextResponse(content=result)
+
+
+@router.post("/profile")
+async def profile_process(
+    seconds: float = Query(10.0, gt=0),
+    format: ProfileFormat = "collapsed",
+    x_debug_token: Optional[str] = Header(None)
+):
+    """Sample every thread in the process for the given number of seconds"""
+    verify_debug_token(x_debug_token)
+    seconds = min(seconds, settings.profiler_max_seconds)
+    
+    profiler = SamplingProfiler(interval=settings.profiler_interval_ms / 1000).start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+    
+    return profile_response(format, profiler.render(format, name=f"process {seconds:.0f}s"))
+
+
+@router.get("/profile/{profile_id}")
+async def get_profile(profile_id: str, x_debug_token: Optional[str] = Header(None)):
+    """Fetch a profile captured for a flagged report request"""
+    verify_debug_token(x_debug_token)
+    stored = profile_results.get(profile_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile_response(*stored)
@@ -1,18 +1,42 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
+from typing import Optional
+import threading
 
 from src.models.schemas import  CompanyReportResponse
 from .schemas import CompanyReportRequest
 from src.services.report_generator import ReportGeneratorService
+from src.services.report_store import ReportStore
+from src.services.deadline import Deadline
+from src.services.stage_stats import stage_stats
+from src.services.profiler import SamplingProfiler, profile_results
 from src.routes.keys import get_api_keys
+from src.routes.debug import ProfileFormat, verify_debug_token
 from src.config import settings
 
 
 router = APIRouter(prefix="/api/report", tags=["reports"])
 
 
+# Report handlers block for the whole crew run, so they are plain functions that
+# FastAPI runs in its threadpool instead of on the event loop
 @router.post("/generate", response_model=CompanyReportResponse)
-async def generate_report(request: CompanyReportRequest):
-    """Generate a structured company report"""
+def generate_report(
+    request: CompanyReportRequest,
+    response: Response,
+    deadline_ms: Optional[int] = Query(None, gt=0),
+    profile: Optional[ProfileFormat] = None,
+    x_debug_token: Optional[str] = Header(None)
+):
+    """Generate a structured company report, optionally sampling it with the profiler"""
+    profiler = None
+    if profile:
+        verify_debug_token(x_debug_token)
+        profiler = SamplingProfiler(
+            interval=settings.profiler_interval_ms / 1000,
+            thread_ids={threading.get_ident()}
+        )
+    
     try:
         api_keys = get_api_keys()
         
@@ -25,20 +49,114 @@ async def generate_report(request: CompanyReportRequest):
         report_service = ReportGeneratorService(
             cohere_api_key=api_keys["cohere"],
             tavily_api_key=api_keys["tavily"],
-            agentops_api_key=settings.agentops_api_key
+            agentops_api_key=settings.agentops_api_key,
+            stage_models=request.models.model_dump(exclude_none=True) if request.models else None,
+            adaptive_routing=request.adaptive_routing
         )
         
-        structured_report = report_service.generate_company_report(
+        if profiler:
+            profiler.start()
+        try:
+            structured_report = report_service.generate_company_report(
+                company_name=request.company_name,
+                company_link=request.company_link,
+                deadline=Deadline(deadline_ms),
+                sector=request.sector
+            )
+        finally:
+            if profiler:
+                profiler.stop()
+                profile_id = profile_results.add(
+                    profile, profiler.render(profile, name=f"report {request.company_name}")
+                )
+                response.headers["X-Profile-Id"] = profile_id
+        
+        return CompanyReportResponse(
             company_name=request.company_name,
-            company_link=request.company_link
+            report=structured_report,
+            company_id=report_service.company_id,
+            report_id=report_service.report_id,
+            report_hash=report_service.report_hash,
+            partial=bool(report_service.missing_sections),
+            missing_sections=report_service.missing_sections
+        )
+        
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        profile_id = response.headers.get("X-Profile-Id")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generating report: {str(e)}",
+            headers={"X-Profile-Id": profile_id} if profile_id else None
+        )
+
+
+@router.post("/{report_id}/retry-writer", response_model=CompanyReportResponse)
+def retry_writer(report_id: str, model: Optional[str] = None):
+    """Re-run only the writer stage of an earlier run, reusing its saved search and analysis"""
+    try:
+        api_keys = get_api_keys()
+        
+        if "cohere" not in api_keys or "tavily" not in api_keys:
+            raise HTTPException(
+                status_code=400,
+                detail="API keys not set. Please set your API keys first."
+            )
+        
+        report_service = ReportGeneratorService(
+            cohere_api_key=api_keys["cohere"],
+            tavily_api_key=api_keys["tavily"],
+            agentops_api_key=settings.agentops_api_key
         )
         
+        structured_report = report_service.retry_writer(report_id, model_id=model)
+        
         return CompanyReportResponse(
-            company_name=request.company_name,
-            report=structured_report
+            company_name=structured_report.company_name,
+            report=structured_report,
+            company_id=report_service.company_id,
+            report_id=report_service.report_id,
+            report_hash=report_service.report_hash
         )
         
     except HTTPException as e:
         raise e
+    except (ValueError, FileNotFoundError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating report: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error retrying writer: {str(e)}")
+
+
+@router.get("/stats/stages")
+async def get_stage_stats():
+    """Per-stage, per-model latency and token estimates since process start"""
+    return {"stages": stage_stats.snapshot()}
+
+
+@router.get("/{report_id}")
+async def get_report(report_id: str, request: Request):
+    """Return a stored report, answering 304 when the client's ETag still matches"""
+    stored = ReportStore().load(report_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    report_data, report_hash = stored
+    headers = {
+        "ETag": f'"{report_hash}"',
+        "Cache-Control": "no-cache"
+    }
+    
+    if_none_match = request.headers.get("if-none-match", "")
+    if f'"{report_hash}"' in if_none_match or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    
+    return JSONResponse(
+        content={
+            "company_name": report_data.get("company_name"),
+            "report": report_data,
+            "report_id": report_id,
+            "report_hash": report_hash
+        },
+        headers=headers
+    )
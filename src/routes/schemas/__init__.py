@@ -1 +1 @@
-from .schemas import APIKeysRequest, CompanyReportRequest
\ No newline at end of file
+from .schemas import APIKeysRequest, CompanyReportRequest, StageModels
\ No newline at end of file
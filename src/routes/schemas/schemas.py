@@ -6,8 +6,17 @@ class APIKeysRequest(BaseModel):
   cohere_api_key: str
   tavily_api_key: str
   
+class StageModels(BaseModel):
+  """Per-request Cohere model overrides for each crew stage"""
+  research: Optional[str] = None
+  analysis: Optional[str] = None
+  writer: Optional[str] = None
+
 class CompanyReportRequest(BaseModel):
   """Request model for company report generation"""
   company_name: str
   company_link: Optional[str] = None
+  models: Optional[StageModels] = None
+  adaptive_routing: Optional[bool] = None
+  sector: Optional[str] = None
   
\ No newline at end of file
@@ -0,0 +1,90 @@
+from typing import Any, Dict, Optional
+from src.logger import get_logger
+import hashlib
+import json
+import os
+import re
+import time
+
+
+logger = get_logger(__name__)
+
+
+# Only files written by put() are ever pruned; other files may share the directory
+CHECKPOINT_FILENAME = re.compile(r"^\w+_[0-9a-f]{64}\.json(\.tmp)?$")
+
+# Stores are built per request, so the last sweep of each directory is tracked process-wide
+PRUNE_INTERVAL_SECONDS = 600
+_last_pruned: Dict[str, float] = {}
+
+
+class CheckpointStore:
+    """Stage outputs on disk keyed by a hash of the stage name and its inputs"""
+
+    def __init__(self, base_dir: str = "src/assets/checkpoints", ttl_hours: float = 24.0):
+        self.base_dir = base_dir
+        self.ttl_seconds = ttl_hours * 3600
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(stage: str, inputs: dict) -> str:
+        canonical = json.dumps({"stage": stage, "inputs": inputs}, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, stage: str, inputs: dict) -> str:
+        return os.path.join(self.base_dir, f"{stage}_{self.make_key(stage, inputs)}.json")
+
+    def get(self, stage: str, inputs: dict) -> Optional[Any]:
+        """Return the checkpointed output, or None when missing, unreadable or older than the TTL"""
+        path = self._path(stage, inputs)
+        if not os.path.exists(path):
+            return None
+        if self._expired(path):
+            self._remove(path)
+            return None
+        try:
+            with open(path, "r") as f:
+                output = json.load(f).get("output")
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable checkpoint", extra={"path": path})
+            return None
+        logger.info("Resuming from %s checkpoint", stage)
+        return output
+
+    def put(self, stage: str, inputs: dict, output: Any) -> None:
+        """Write atomically so a crash mid-write never leaves a truncated checkpoint"""
+        path = self._path(stage, inputs)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"stage": stage, "created_at": time.time(), "output": output}, f)
+        os.replace(tmp_path, path)
+
+        if time.time() - _last_pruned.get(self.base_dir, 0.0) > PRUNE_INTERVAL_SECONDS:
+            _last_pruned[self.base_dir] = time.time()
+            self.prune()
+
+    def prune(self) -> int:
+        """Delete checkpoints older than the TTL so a long-lived worker's directory stays bounded"""
+        if not self.ttl_seconds:
+            return 0
+        removed = 0
+        for filename in os.listdir(self.base_dir):
+            path = os.path.join(self.base_dir, filename)
+            if CHECKPOINT_FILENAME.match(filename) and self._expired(path) and self._remove(path):
+                removed += 1
+        if removed:
+            logger.info("Pruned %d expired checkpoints", removed, extra={"base_dir": self.base_dir})
+        return removed
+
+    def _expired(self, path: str) -> bool:
+        try:
+            return bool(self.ttl_seconds) and time.time() - os.path.getmtime(path) > self.ttl_seconds
+        except OSError:
+            return False
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,54 @@
+from typing import Optional
+import time
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a pipeline stage is skipped or abandoned because the request deadline passed"""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        super().__init__(f"Deadline exceeded before {stage} stage completed")
+
+
+class Deadline:
+    """Request-level deadline measured on the monotonic clock; None means no deadline"""
+
+    def __init__(self, timeout_ms: Optional[float] = None):
+        self.timeout_ms = timeout_ms
+        self.expires_at = time.monotonic() + timeout_ms / 1000 if timeout_ms else None
+        self.cancelled = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.expires_at is not None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, floored at zero, or None when there is no deadline"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self, margin: float = 0.0) -> bool:
+        """True once cancelled or fewer than `margin` seconds remain"""
+        if self.cancelled:
+            return True
+        remaining = self.remaining()
+        return remaining is not None and remaining <= margin
+
+    def shortened(self, seconds: float) -> "Deadline":
+        """A separate deadline `seconds` earlier, for stages that must leave time for later ones"""
+        shortened = Deadline()
+        if self.expires_at is not None:
+            shortened.expires_at = self.expires_at - seconds
+            shortened.timeout_ms = max(0.0, self.timeout_ms - seconds * 1000)
+        shortened.cancelled = self.cancelled
+        return shortened
+
+    def cancel(self) -> None:
+        """Mark the request abandoned so stages still running stop at their next check"""
+        self.cancelled = True
+
+    def check(self, stage: str, margin: float = 0.0) -> None:
+        """Raise DeadlineExceeded instead of starting `stage` too close to the deadline"""
+        if self.expired(margin):
+            raise DeadlineExceeded(stage)
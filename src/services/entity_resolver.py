@@ -0,0 +1,170 @@
+from typing import FrozenSet, Optional, Tuple
+from urllib.parse import urlparse
+from src.logger import get_logger
+import json
+import os
+import re
+import threading
+
+
+logger = get_logger(__name__)
+
+
+LEGAL_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited", "llc",
+    "plc", "ag", "sa", "nv", "bv", "gmbh", "se", "spa", "oyj", "ab", "asa", "holdings", "group"
+}
+
+# Second-level labels that sit under a country TLD, e.g. vodafone.co.uk
+SECOND_LEVEL_DOMAINS = {"co", "com", "net", "org", "gov", "ac"}
+
+# Every request builds its own resolver, so index writes are serialized process-wide
+_index_lock = threading.Lock()
+
+# Words that don't tell companies apart; names match when their remaining words are the same set
+GENERIC_TOKENS = LEGAL_SUFFIXES | {"the", "and", "of"}
+
+
+def normalize_company_name(name: str) -> str:
+    """Lowercase, drop punctuation and trailing legal suffixes: 'Apple Inc.' -> 'apple'"""
+    tokens = re.sub(r"[^\w\s]", " ", (name or "").lower().replace("&", " and ")).split()
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def name_tokens(normalized: str) -> FrozenSet[str]:
+    """Distinctive words of a normalized name: 'the coca cola' -> {'coca', 'cola'}"""
+    tokens = normalized.split()
+    return frozenset(token for token in tokens if token not in GENERIC_TOKENS) or frozenset(tokens)
+
+
+def company_slug(name: str) -> str:
+    """Filesystem-safe key for a company name; idempotent on its own output"""
+    return normalize_company_name(name).replace(" ", "-") or "unknown"
+
+
+def domain_key(company_link: Optional[str]) -> Optional[str]:
+    """Registrable domain label of a company URL: 'https://www.meta.com/about' -> 'meta'"""
+    if not company_link or not company_link.strip():
+        return None
+    link = company_link.strip()
+    if "://" not in link:
+        link = f"http://{link}"
+    host = (urlparse(link).hostname or "").lower()
+    labels = [label for label in host.split(".") if label and label != "www"]
+    if len(labels) < 2:
+        return labels[0] if labels else None
+    if len(labels) >= 3 and labels[-2] in SECOND_LEVEL_DOMAINS:
+        return labels[-3]
+    return labels[-2]
+
+
+def domain_matches_name(domain: str, normalized: str) -> bool:
+    """Whether a domain label plausibly belongs to the named company: 'vodafone' for 'vodafone group',
+    'cocacola' for 'coca cola', 'ibm' for 'international business machines'; never 'wikipedia' for 'meta'"""
+    tokens = [token for token in normalized.split() if token not in GENERIC_TOKENS] or normalized.split()
+    if not tokens:
+        return False
+    label = domain.replace("-", "")
+    candidates = set(tokens) | {"".join(tokens)}
+    if len(tokens) > 1:
+        candidates.add("".join(token[0] for token in tokens))
+    return label in candidates
+
+
+class CompanyEntityResolver:
+    """Maps free-text company names and links to a canonical company id via a persisted alias index"""
+
+    def __init__(self, index_path: str = "src/assets/entities.json", assets_dir: str = "src/assets"):
+        self.index_path = index_path
+        self.assets_dir = assets_dir
+
+    def _empty_index(self) -> dict:
+        return {"aliases": {}, "domains": {}}
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.index_path):
+            return self._bootstrap()
+        try:
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            logger.warning("Rebuilding unreadable entity index", extra={"path": self.index_path})
+            return self._bootstrap()
+
+    def _save(self, index: dict) -> None:
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def _bootstrap(self) -> dict:
+        """Seed the alias index from the company names and links of past report runs"""
+        index = self._empty_index()
+        if not os.path.isdir(self.assets_dir):
+            return index
+
+        for run_dir in sorted(os.listdir(self.assets_dir)):
+            company_name, company_link = None, None
+            for filename in ("search.json", "research.json", "writer.json"):
+                path = os.path.join(self.assets_dir, run_dir, filename)
+                if not os.path.isfile(path):
+                    continue
+                try:
+                    with open(path, "r") as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                company_name = company_name or data.get("company")
+                company_link = company_link or data.get("company_link")
+            if company_name:
+                self._match_or_register(index, company_name, company_link)
+
+        logger.info("Bootstrapped entity index with %d aliases", len(index["aliases"]))
+        return index
+
+    def _match(self, index: dict, normalized: str, domain: Optional[str]) -> Tuple[Optional[str], bool]:
+        """Matched company id and whether the name itself matched (rather than only the domain)"""
+        if normalized in index["aliases"]:
+            return index["aliases"][normalized], True
+        # Word order and filler words may differ, but every distinctive word must match:
+        # a character-level fuzzy match would merge 'Deutsche Bahn' into 'Deutsche Bank'
+        tokens = name_tokens(normalized)
+        if tokens:
+            for alias, company_id in index["aliases"].items():
+                if name_tokens(alias) == tokens:
+                    return company_id, True
+        # Shared hosts (wikipedia, linkedin, ...) say nothing about the company, so a domain
+        # only counts when its label matches the name
+        if domain and domain_matches_name(domain, normalized):
+            if domain in index["domains"]:
+                return index["domains"][domain], False
+            # 'Meta Platforms' at meta.com is the company already known as 'Meta'
+            if domain in index["aliases"]:
+                return index["aliases"][domain], False
+        return None, False
+
+    def _match_or_register(self, index: dict, company_name: str, company_link: Optional[str]) -> str:
+        normalized = normalize_company_name(company_name)
+        domain = domain_key(company_link)
+        company_id, name_matched = self._match(index, normalized, domain)
+        if company_id is None:
+            company_id, name_matched = company_slug(company_name), True
+        # A domain-only match never teaches the index a new name for the company
+        if normalized and name_matched:
+            index["aliases"].setdefault(normalized, company_id)
+        if domain and domain_matches_name(domain, normalized):
+            index["domains"].setdefault(domain, company_id)
+        return company_id
+
+    def resolve(self, company_name: str, company_link: Optional[str] = None) -> str:
+        """Canonical id for a company, learning the name and domain as aliases for next time"""
+        with _index_lock:
+            index = self._load()
+            aliases_before, domains_before = len(index["aliases"]), len(index["domains"])
+            company_id = self._match_or_register(index, company_name, company_link)
+            if (len(index["aliases"]), len(index["domains"])) != (aliases_before, domains_before) \
+                    or not os.path.exists(self.index_path):
+                self._save(index)
+        return company_id
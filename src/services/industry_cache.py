@@ -0,0 +1,145 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from src.services.checkpoint_store import CheckpointStore
+from src.services.entity_resolver import company_slug
+from src.logger import get_logger
+import json
+import os
+import re
+import threading
+
+
+logger = get_logger(__name__)
+
+
+# Keyword stems per sector, matched at the start of words in an IndustryOverview's landscape and
+# challenges ('telecom' counts 'Telecommunications', 'smartphone' counts 'smartphones')
+SECTOR_KEYWORDS: Dict[str, tuple] = {
+    "telecommunications": ("telecom", "mobile network", "fixed service", "fixed-line", "5g", "broadband", "wireless", "carrier", "spectrum", "iot"),
+    "technology": ("software", "smartphone", "personal computer", "tablet", "wearable", "semiconductor", "cloud computing", "consumer electronic", "digital service", "internet service", "search engine"),
+    "social_media": ("social media", "social network", "social technolog", "advertising platform", "ads", "messaging app", "metaverse", "vr", "mixed reality", "immersive"),
+    "financial_services": ("banking", "banks", "insur", "payment", "asset management", "fintech", "lending"),
+    "healthcare": ("pharma", "healthcare", "biotech", "medical device", "hospital", "drug"),
+    "energy": ("oil", "natural gas", "renewable", "utilit", "electricity", "solar", "petroleum"),
+    "retail": ("retail", "e-commerce", "grocer", "consumer goods", "supermarket"),
+    "automotive": ("automotive", "electric vehicle", "car manufacturer", "automaker", "vehicle"),
+}
+
+# Every request builds its own cache object, so index writes are serialized process-wide
+_index_lock = threading.Lock()
+
+# Without an explicit sector, a classification must score at least this and beat the runner-up
+# before it is recorded or its section shared; a stray keyword or two is only a guess. The sample
+# reports in src/assets score 3 (Vodafone, Google) to 6 (Meta) with every runner-up at 0
+MIN_CLASSIFY_SCORE = 3
+
+# Values the schema validators substitute for missing data; never worth sharing across companies
+PLACEHOLDER_LANDSCAPES = {"Information not available", ""}
+
+
+def normalize_sector(sector: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", sector.strip().lower()).strip("_")
+
+
+def current_window(now: Optional[datetime] = None) -> str:
+    """Time window industry context is shared within, e.g. '2025-Q4'"""
+    now = now or datetime.now()
+    return f"{now.year}-Q{(now.month - 1) // 3 + 1}"
+
+
+class IndustryContextCache:
+    """Industry sections generated once per sector and time window and reused across companies"""
+
+    INDEX_FILENAME = "company_sectors.json"
+
+    def __init__(self, base_dir: str = "src/assets/industry", ttl_hours: float = 168.0):
+        self.store = CheckpointStore(base_dir=base_dir, ttl_hours=ttl_hours)
+        self.index_path = os.path.join(base_dir, self.INDEX_FILENAME)
+
+    def _load_index(self) -> Dict[str, str]:
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _company_key(self, company_name: str) -> str:
+        """Same key as a canonical company id, so competitor names line up with indexed companies"""
+        return company_slug(company_name)
+
+    def score(self, industry: dict) -> Tuple[Optional[str], int]:
+        """Best sector and its score from keyword stems in the landscape text plus sectors of known competitors"""
+        text = " ".join(
+            str(industry.get(field) or "") for field in ("market_landscape", "market_challenges")
+        ).lower()
+        scores: Counter = Counter()
+        for sector, keywords in SECTOR_KEYWORDS.items():
+            scores[sector] += sum(1 for keyword in keywords if re.search(rf"\b{re.escape(keyword)}\w*", text))
+
+        index = self._load_index()
+        for competitor in industry.get("competition") or []:
+            sector = index.get(self._company_key(str(competitor)))
+            if sector:
+                scores[sector] += 2
+
+        ranked = scores.most_common(2)
+        if not ranked or ranked[0][1] == 0:
+            return None, 0
+        if len(ranked) > 1 and ranked[1][1] == ranked[0][1]:
+            return None, ranked[0][1]
+        return ranked[0]
+
+    def classify(self, industry: dict) -> Optional[str]:
+        """Sector of an industry section, or None when the evidence is too thin to share it on"""
+        sector, score = self.score(industry)
+        return sector if score >= MIN_CLASSIFY_SCORE else None
+
+    def resolve_sector(self, company_name: str, sector: Optional[str] = None) -> Optional[str]:
+        """Explicit sector if given, otherwise the one recorded from the company's last report"""
+        if sector:
+            return normalize_sector(sector)
+        return self._load_index().get(self._company_key(company_name))
+
+    def get(self, sector: str, company_id: Optional[str] = None, window: Optional[str] = None) -> Optional[dict]:
+        """Fresh cached IndustryOverview data for the sector, with competition adjusted for the reusing company"""
+        entry = self.store.get("industry", {"sector": sector, "window": window or current_window()})
+        if entry is None:
+            return None
+        if "industry" not in entry:
+            # Entries cached before the seeding company was recorded alongside the section
+            entry = {"company": None, "industry": entry}
+
+        industry = dict(entry["industry"])
+        if company_id:
+            own_key = self._company_key(company_id)
+            competition = [c for c in industry.get("competition") or [] if self._company_key(str(c)) != own_key]
+            seed = entry.get("company")
+            if seed and self._company_key(seed) != own_key \
+                    and all(self._company_key(str(c)) != self._company_key(seed) for c in competition):
+                competition.append(seed)
+            industry["competition"] = competition
+        return industry
+
+    def remember(self, company_id: str, industry: dict, sector: Optional[str] = None,
+                 share: bool = True, company_name: Optional[str] = None) -> Optional[str]:
+        """Record the company's sector and seed the sector cache from its industry section"""
+        sector = sector or self.classify(industry)
+        if not sector:
+            return None
+
+        with _index_lock:
+            index = self._load_index()
+            index[self._company_key(company_id)] = sector
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(index, f, indent=2)
+            os.replace(tmp_path, self.index_path)
+
+        if share and industry.get("market_landscape") not in PLACEHOLDER_LANDSCAPES and self.get(sector) is None:
+            entry = {"company": company_name or company_id, "industry": industry}
+            self.store.put("industry", {"sector": sector, "window": current_window()}, entry)
+            logger.info("Cached industry context", extra={"sector": sector, "company": company_name or company_id})
+        return sector
@@ -0,0 +1,168 @@
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import os
+import sys
+import threading
+import time
+import uuid
+
+
+UNATTRIBUTED_STAGE = "unattributed"
+
+# Pipeline stage currently running on each thread, keyed by thread id
+_thread_stages: Dict[int, str] = {}
+
+# Per-request profiler of the current context; worker threads spawned with a copy of the
+# context join its sampled threads as soon as they enter a stage
+_request_profiler: ContextVar[Optional["SamplingProfiler"]] = ContextVar("request_profiler", default=None)
+
+
+def set_stage(name: Optional[str]) -> None:
+    """Attribute subsequent samples on the calling thread to a pipeline stage"""
+    if name is None:
+        _thread_stages.pop(threading.get_ident(), None)
+        return
+    _thread_stages[threading.get_ident()] = name
+    profiler = _request_profiler.get()
+    if profiler is not None and profiler.thread_ids is not None:
+        profiler.thread_ids.add(threading.get_ident())
+
+
+@contextmanager
+def profile_stage(name: str) -> Iterator[None]:
+    """Attribute samples taken inside the block to a pipeline stage"""
+    previous = _thread_stages.get(threading.get_ident())
+    set_stage(name)
+    try:
+        yield
+    finally:
+        set_stage(previous)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename.split(os.sep)
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Background-thread sampling profiler built on sys._current_frames()"""
+
+    def __init__(self, interval: float = 0.01, thread_ids: Optional[Set[int]] = None,
+                 max_depth: int = 128):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._context_token = None
+
+    def start(self) -> "SamplingProfiler":
+        """Start sampling; a profiler limited to given threads also follows this context's workers"""
+        self.started_at = time.perf_counter()
+        if self.thread_ids is not None:
+            self._context_token = _request_profiler.set(self)
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._context_token is not None:
+            _request_profiler.reset(self._context_token)
+            self._context_token = None
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+                self.samples[self._stack(thread_id, frame)] += 1
+
+    def _stack(self, thread_id: int, frame) -> Tuple[str, ...]:
+        """Root-to-leaf stack prefixed with the thread's pipeline stage"""
+        stack: List[str] = []
+        while frame is not None and len(stack) < self.max_depth:
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+        stage = _thread_stages.get(thread_id, UNATTRIBUTED_STAGE)
+        return (f"stage:{stage}",) + tuple(reversed(stack))
+
+    def collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack format, one 'frame;frame;frame count' per line"""
+        lines = [f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common()]
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str = "profile") -> dict:
+        """Speedscope 'sampled' profile document"""
+        frame_index: Dict[str, int] = {}
+        frames: List[dict] = []
+        samples: List[List[int]] = []
+        weights: List[float] = []
+
+        for stack, count in self.samples.items():
+            indices = []
+            for label in stack:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    frames.append({"name": label})
+                indices.append(frame_index[label])
+            samples.append(indices)
+            weights.append(count * self.interval)
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self.duration,
+                "samples": samples,
+                "weights": weights
+            }],
+            "name": name,
+            "exporter": "company-report-generator"
+        }
+
+    def render(self, output_format: str, name: str = "profile"):
+        if output_format == "speedscope":
+            return self.speedscope(name)
+        return self.collapsed()
+
+
+class ProfileResultStore:
+    """Keeps the most recent profiles so per-request results can be fetched afterwards"""
+
+    def __init__(self, max_items: int = 20):
+        self.max_items = max_items
+        self._results: "OrderedDict[str, Tuple[str, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, output_format: str, result) -> str:
+        profile_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._results[profile_id] = (output_format, result)
+            while len(self._results) > self.max_items:
+                self._results.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> Optional[Tuple[str, object]]:
+        with self._lock:
+            return self._results.get(profile_id)
+
+
+profile_results = ProfileResultStore()
@@ -1,89 +1,247 @@
-from typing import Optional
+from typing import Dict, List, Optional
 from src.services.tavily_service import TavilySearchService
-from src.agents.crew import CompanyReportCrew
+from src.agents.crew import CompanyReportCrew, STAGES
+from src.services.report_store import ReportStore
+from src.services.deadline import Deadline, DeadlineExceeded
+from src.services.profiler import profile_stage
+from src.services.stage_stats import stage_stats
+from src.services.industry_cache import IndustryContextCache
+from src.services.entity_resolver import CompanyEntityResolver, normalize_company_name
+from src.config import settings
 from src.models.schemas import StructuredCompanyReport
 from pydantic import ValidationError
+from src.logger import get_logger
 import json
+import os
+
+
+logger = get_logger(__name__)
 
 
 class ReportGeneratorService:
     """Service that orchestrates report generation using CrewAI agents"""
     
-    def __init__(self, cohere_api_key: str, tavily_api_key: str, agentops_api_key: str = None, model_id: str = "command-a-03-2025"):
+    def __init__(self, cohere_api_key: str, tavily_api_key: str, agentops_api_key: str = None, model_id: Optional[str] = None,
+                 stage_models: Optional[Dict[str, str]] = None, adaptive_routing: Optional[bool] = None):
         """Initialize report generator service"""
         self.tavily_service = TavilySearchService(tavily_api_key=tavily_api_key)
-        self.crew = CompanyReportCrew(cohere_api_key=cohere_api_key, agentops_api_key=agentops_api_key, model_id=model_id)
+        self.crew = CompanyReportCrew(
+            cohere_api_key=cohere_api_key,
+            agentops_api_key=agentops_api_key,
+            model_id=model_id,
+            stage_models=stage_models
+        )
+        self.adaptive_routing = settings.adaptive_model_routing if adaptive_routing is None else adaptive_routing
+        self.report_store = ReportStore(base_dir=self.crew.output_dir)
+        self.report_id: Optional[str] = None
+        self.report_hash: Optional[str] = None
+        self.missing_sections: List[str] = []
+        self.industry_cache = IndustryContextCache(
+            base_dir=os.path.join(self.crew.output_dir, "industry"),
+            ttl_hours=settings.industry_cache_ttl_hours
+        )
+        self.industry_context: Optional[dict] = None
+        self.entity_resolver = CompanyEntityResolver(
+            index_path=os.path.join(self.crew.output_dir, "entities.json"),
+            assets_dir=self.crew.output_dir
+        )
+        self.company_id: Optional[str] = None
     
-    def generate_company_report(self, company_name: str, company_link: Optional[str] = None) -> StructuredCompanyReport:
-        """Generate a complete structured company report"""
+    def generate_company_report(self, company_name: str, company_link: Optional[str] = None,
+                                deadline: Optional[Deadline] = None, sector: Optional[str] = None) -> StructuredCompanyReport:
+        """Generate a complete structured company report, returning a partial one if the deadline hits"""
+        deadline = deadline or Deadline()
+        self.missing_sections = []
         try:
-            print(f"\n{'='*60}")
-            print(f"## Starting report generation for {company_name}...")
-            print(f"{'='*60}\n")
+            # Name variants ("Apple", "apple inc.") share one id, which keys every cache and store below
+            self.company_id = self.entity_resolver.resolve(company_name, company_link)
+            logger.info("Starting report generation", extra={"company": company_name, "company_id": self.company_id})
             
-            print(f"## STEP 1 Searching for comprehensive information about {company_name}...")
-            company_details = self.tavily_service.get_company_details(company_name, company_link)
+            # With a fresh industry section cached for the sector, the crew only writes company-specific sections
+            self.industry_context = None
+            if settings.industry_cache_enabled:
+                sector = self.industry_cache.resolve_sector(self.company_id, sector)
+                self.industry_context = self.industry_cache.get(sector, self.company_id) if sector else None
+            include_industry = self.industry_context is None
+            
+            logger.info("Step 1: searching company information", extra={"company": company_name})
+            self.crew.create_report_dir(self.company_id)
+            # The name is part of the key too, so a wrong id merge can never serve another company's search
+            search_inputs = {"company_id": self.company_id, "company_name": normalize_company_name(company_name)}
+            company_details = self.crew.checkpoints.get("search", search_inputs)
+            if company_details is None:
+                with profile_stage("search"):
+                    company_details = self.tavily_service.get_company_details(company_name, company_link, deadline=deadline)
+                # Searches cut short by the deadline are incomplete and not worth resuming from
+                if company_details.get("sources") and not deadline.expired():
+                    self.crew.checkpoints.put("search", search_inputs, company_details)
+            self.crew.save_search_output(
+                company_name, company_details, sector=sector, include_industry=include_industry,
+                company_id=self.company_id, company_link=company_link
+            )
             raw_content = company_details.get("raw_content", "")
             sources = company_details.get("sources", [])
             
-            # print(f"## SUCCESS Found comprehensive company information from {len(sources)} sources\n")
-            print(f"{'-'*60}\n")
-            
-            print(f"## STEP 2 Generating structured report using AI agents...")
-            report_dict = self.crew.generate_report(company_name, raw_content)
-            
-            if isinstance(report_dict, str):
-                # print(f"## WARNING Report is string, converting to dict ")
-                try:
-                    json_str = report_dict
-                    if "```json" in json_str:
-                        json_str = json_str.split("```json")[1].split("```")[0]
-                    elif "```" in json_str:
-                        json_str = json_str.split("```")[1].split("```")[0]
-                    report_dict = json.loads(json_str.strip())
-                except:
-                    # print(f"## ERROR Could not convert string to dict")
-                    return self._create_fallback_report(company_name)
-            
-            if not isinstance(report_dict, dict):
-                report_dict = {}
+            logger.info("Step 2: generating structured report", extra={"company": company_name, "sources": len(sources)})
+            try:
+                report_text = self.crew.generate_report(
+                    company_name, raw_content, deadline=deadline, include_industry=include_industry
+                )
+            except DeadlineExceeded as e:
+                logger.warning("%s, returning partial report", e)
+                return self._store_report(self._create_partial_report(company_name, self._parse_report({}, sources)))
             
-            if isinstance(report_dict, dict) and "references" in report_dict:
-                if isinstance(report_dict["references"], dict):
-                    existing_refs = report_dict["references"].get("references", [])
-                    for source in sources:
-                        if source not in existing_refs:
-                            existing_refs.append(source)
-                    report_dict["references"]["references"] = existing_refs[:15]
-                else:
-                    report_dict["references"] = {
-                        "references": sources[:15] if sources else [{"source_name": "Research", "url": "https://example.com"}]
-                    }
-            else:
-                report_dict["references"] = {
-                    "references": sources[:15] if sources else [{"source_name": "Research", "url": "https://example.com"}]
-                }
+            structured_report = self._finalize_report(company_name, report_text, sources, deadline, company_data=raw_content)
             
-            print(f"## STEP 3 Validating report against schema...")
-            try:
-                structured_report = StructuredCompanyReport.parse_obj(report_dict)
-                print(f"## SUCCESS Report validated successfully\n")
-            except ValidationError as ve:
-                print(f"## WARNING Validation error: {ve}")
-                structured_report = StructuredCompanyReport.parse_obj(report_dict)
+            if settings.industry_cache_enabled and "industry" not in self.missing_sections:
+                self.industry_cache.remember(
+                    self.company_id, structured_report.industry.model_dump(), sector,
+                    share=include_industry, company_name=company_name
+                )
             
-            print(f"{'='*60}")
-            print(f"## Report generation completed successfully!")
-            print(f"{'='*60}\n")
+            logger.info("Report generation completed", extra={"company": company_name, "report_id": self.report_id})
             
             return structured_report
             
         except Exception as e:
-            print(f"\n## ERROR Report generation failed: {str(e)}\n")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Report generation failed", extra={"company": company_name})
             raise Exception(f"Error generating report for {company_name}: {str(e)}")
     
+    def retry_writer(self, report_id: str, model_id: Optional[str] = None) -> StructuredCompanyReport:
+        """Re-run only the writer stage of an earlier run from its saved analysis output"""
+        self.missing_sections = []
+        run = self.crew.load_run(report_id)
+        company_name = run["company_name"]
+        self.company_id = run.get("company_id") or self.entity_resolver.resolve(company_name)
+        self.industry_context = None
+        if not self.crew.include_industry and run.get("sector"):
+            self.industry_context = self.industry_cache.get(run["sector"], self.company_id)
+        
+        logger.info("Retrying writer stage", extra={"company": company_name, "report_id": report_id})
+        report_text = self.crew.rewrite_report(company_name, model_id or self.crew.stage_models["writer"])
+        return self._finalize_report(company_name, report_text, run["sources"], Deadline())
+    
+    def _finalize_report(self, company_name: str, report_text: str, sources: list, deadline: Deadline,
+                         company_data: Optional[str] = None) -> StructuredCompanyReport:
+        """Validate the writer output, escalating or falling back as configured, and store the result"""
+        logger.info("Step 3: validating report against schema")
+        report_dict, structured_report = self._parse_and_validate(report_text, sources)
+        
+        if structured_report is None:
+            stage_stats.record_failure("writer", self.crew.stage_models["writer"])
+            
+            margin = settings.deadline_margin_ms / 1000
+            if self.adaptive_routing and not deadline.expired(margin):
+                report_text = self._escalate(company_name, company_data, deadline)
+                if report_text is not None:
+                    retry_dict, structured_report = self._parse_and_validate(report_text, sources)
+                    if structured_report is None:
+                        stage_stats.record_failure("writer", settings.fallback_model)
+                    report_dict = retry_dict if retry_dict is not None else report_dict
+        
+        if structured_report is None:
+            if deadline.enabled:
+                partial_data = report_dict if report_dict is not None else self._parse_report({}, sources)
+                return self._store_report(self._create_partial_report(company_name, partial_data))
+            if report_dict is None:
+                return self._store_report(self._create_fallback_report(company_name))
+            structured_report = StructuredCompanyReport.parse_obj(report_dict)
+        
+        return self._store_report(structured_report)
+    
+    def _escalate(self, company_name: str, company_data: Optional[str], deadline: Deadline) -> Optional[str]:
+        """Re-run every stage not on the fallback model, since a bad small-model extraction fails the writer too"""
+        fallback = settings.fallback_model
+        stages = [stage for stage in STAGES if self.crew.stage_models[stage] != fallback]
+        if company_data is None:
+            stages = [stage for stage in stages if stage == "writer"]
+        if not stages:
+            return None
+        
+        logger.warning("Report failed validation, re-running %s with %s", ", ".join(stages), fallback)
+        for stage in stages:
+            stage_stats.record_escalation(stage, self.crew.stage_models[stage])
+        try:
+            if stages == ["writer"]:
+                return self.crew.rewrite_report(company_name, fallback, deadline=deadline)
+            self.crew.set_stage_models({stage: fallback for stage in stages})
+            return self.crew.generate_report(
+                company_name, company_data, deadline=deadline, include_industry=self.crew.include_industry
+            )
+        except DeadlineExceeded as e:
+            logger.warning("%s, keeping first output", e)
+            return None
+    
+    def _parse_and_validate(self, report_text, sources: list):
+        """Return (report_dict, structured_report); either is None when that step fails"""
+        with profile_stage("parse"):
+            report_dict = self._parse_report(report_text, sources)
+        
+        if report_dict is None:
+            return None, None
+        
+        with profile_stage("validate"):
+            try:
+                structured_report = StructuredCompanyReport.parse_obj(report_dict)
+                logger.info("Report validated successfully")
+                return report_dict, structured_report
+            except ValidationError as ve:
+                logger.warning("Validation error: %s", ve)
+                return report_dict, None
+    
+    def _parse_report(self, report_dict, sources: list) -> Optional[dict]:
+        """Turn the crew output into a dict, merge search sources into its references and inject cached industry context"""
+        if isinstance(report_dict, str):
+            # print(f"## WARNING Report is string, converting to dict ")
+            try:
+                json_str = report_dict
+                if "```json" in json_str:
+                    json_str = json_str.split("```json")[1].split("```")[0]
+                elif "```" in json_str:
+                    json_str = json_str.split("```")[1].split("```")[0]
+                report_dict = json.loads(json_str.strip())
+            except:
+                # print(f"## ERROR Could not convert string to dict")
+                return None
+        
+        if not isinstance(report_dict, dict):
+            report_dict = {}
+        
+        if isinstance(report_dict, dict) and "references" in report_dict:
+            if isinstance(report_dict["references"], dict):
+                existing_refs = report_dict["references"].get("references", [])
+                for source in sources:
+                    if source not in existing_refs:
+                        existing_refs.append(source)
+                report_dict["references"]["references"] = existing_refs[:15]
+            else:
+                report_dict["references"] = {
+                    "references": sources[:15] if sources else [{"source_name": "Research", "url": "https://example.com"}]
+                }
+        else:
+            report_dict["references"] = {
+                "references": sources[:15] if sources else [{"source_name": "Research", "url": "https://example.com"}]
+            }
+        
+        if self.industry_context:
+            report_dict["industry"] = dict(self.industry_context)
+        
+        return report_dict
+    
+    def _store_report(self, structured_report: StructuredCompanyReport) -> StructuredCompanyReport:
+        """Persist the validated report in the crew's report directory and record its hash"""
+        report_dir = getattr(self.crew, "report_dir", None)
+        if report_dir:
+            self.report_id = os.path.basename(report_dir)
+            self.report_hash = self.report_store.save(self.report_id, structured_report)
+        return structured_report
+    
+    def _create_partial_report(self, company_name: str, report_dict: dict) -> StructuredCompanyReport:
+        """Keep every section that validates and fill the rest from the fallback report"""
+        structured_report, self.missing_sections = StructuredCompanyReport.from_partial(company_name, report_dict)
+        logger.warning("Partial report", extra={"missing_sections": self.missing_sections})
+        return structured_report
+    
     def _create_fallback_report(self, company_name: str) -> StructuredCompanyReport:
       """Create a fallback report """
       return StructuredCompanyReport.create_fallback(company_name)
\ No newline at end of file
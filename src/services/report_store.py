@@ -0,0 +1,51 @@
+from typing import Optional, Tuple
+from src.models.schemas import StructuredCompanyReport
+import hashlib
+import json
+import os
+
+
+class ReportStore:
+    """Persists validated reports next to the agent outputs and hashes them for ETags"""
+
+    REPORT_FILENAME = "report.json"
+
+    def __init__(self, base_dir: str = "src/assets"):
+        self.base_dir = base_dir
+
+    @staticmethod
+    def compute_hash(report_data: dict) -> str:
+        """Hash the canonical JSON form of a report"""
+        canonical = json.dumps(report_data, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _report_path(self, report_id: str) -> Optional[str]:
+        """Resolve a report id to its file, refusing anything outside the base dir"""
+        if not report_id or os.path.basename(report_id) != report_id:
+            return None
+        return os.path.join(self.base_dir, report_id, self.REPORT_FILENAME)
+
+    def save(self, report_id: str, report: StructuredCompanyReport) -> str:
+        """Write the validated report and return its content hash"""
+        path = self._report_path(report_id)
+        if path is None:
+            raise ValueError(f"Invalid report id: {report_id}")
+
+        report_data = report.model_dump()
+        report_hash = self.compute_hash(report_data)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"report_hash": report_hash, "report": report_data}, f, indent=2)
+        return report_hash
+
+    def load(self, report_id: str) -> Optional[Tuple[dict, str]]:
+        """Return (report_data, report_hash) for a stored report, or None"""
+        path = self._report_path(report_id)
+        if path is None or not os.path.exists(path):
+            return None
+
+        with open(path, "r") as f:
+            stored = json.load(f)
+        report_data = stored.get("report", {})
+        report_hash = stored.get("report_hash") or self.compute_hash(report_data)
+        return report_data, report_hash
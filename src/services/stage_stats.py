@@ -0,0 +1,64 @@
+from typing import Dict, Tuple
+import threading
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for prompts and outputs"""
+    return (len(text) + 3) // 4 if text else 0
+
+
+class StageStats:
+    """Process-wide latency and token counters per (pipeline stage, model)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def _entry(self, stage: str, model: str) -> Dict[str, float]:
+        return self._stats.setdefault((stage, model), {
+            "runs": 0,
+            "failures": 0,
+            "escalations": 0,
+            "total_latency_s": 0.0,
+            "max_latency_s": 0.0,
+            "input_tokens": 0,
+            "output_tokens": 0
+        })
+
+    def record(self, stage: str, model: str, latency_s: float, input_text: str = "",
+               output_text: str = "") -> None:
+        with self._lock:
+            entry = self._entry(stage, model)
+            entry["runs"] += 1
+            entry["total_latency_s"] += latency_s
+            entry["max_latency_s"] = max(entry["max_latency_s"], latency_s)
+            entry["input_tokens"] += estimate_tokens(input_text)
+            entry["output_tokens"] += estimate_tokens(output_text)
+
+    def record_failure(self, stage: str, model: str) -> None:
+        """Count an output from this stage/model that failed validation"""
+        with self._lock:
+            self._entry(stage, model)["failures"] += 1
+
+    def record_escalation(self, stage: str, model: str) -> None:
+        """Count a run where this stage/model was re-run on the fallback model after the report failed validation"""
+        with self._lock:
+            self._entry(stage, model)["escalations"] += 1
+
+    def snapshot(self) -> list:
+        with self._lock:
+            rows = []
+            for (stage, model), entry in sorted(self._stats.items()):
+                runs = entry["runs"] or 1
+                rows.append({
+                    "stage": stage,
+                    "model": model,
+                    **entry,
+                    "avg_latency_s": entry["total_latency_s"] / runs,
+                    "avg_input_tokens": entry["input_tokens"] / runs,
+                    "avg_output_tokens": entry["output_tokens"] / runs
+                })
+            return rows
+
+
+stage_stats = StageStats()
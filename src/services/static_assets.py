@@ -0,0 +1,129 @@
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.types import Scope
+from starlette.responses import Response
+from typing import Dict, Optional
+from src.logger import get_logger
+import anyio
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+logger = get_logger(__name__)
+
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".html", ".json", ".svg", ".txt")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+class StaticAssetManifest:
+    """Content hashes and precompressed copies of files under the static directory"""
+
+    def __init__(self, directory: str = "static", url_prefix: str = "/static"):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.hashes: Dict[str, str] = {}
+
+    def build(self) -> None:
+        """Hash every static file and write .gz/.br siblings for compressible ones"""
+        self.hashes = {}
+        if not os.path.isdir(self.directory):
+            return
+
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                if filename.endswith((".gz", ".br")):
+                    continue
+                full_path = os.path.join(root, filename)
+                with open(full_path, "rb") as f:
+                    content = f.read()
+
+                rel_path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                self.hashes[rel_path] = hashlib.sha256(content).hexdigest()[:12]
+
+                if filename.endswith(COMPRESSIBLE_EXTENSIONS):
+                    self._write_compressed(full_path, content)
+
+        logger.info("Indexed %d static assets", len(self.hashes))
+
+    def _write_compressed(self, full_path: str, content: bytes) -> None:
+        """Write precompressed variants unless they are already newer than the source"""
+        source_mtime = os.path.getmtime(full_path)
+        variants = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", lambda data: brotli.compress(data, quality=11)))
+
+        for suffix, compress in variants:
+            target = full_path + suffix
+            if os.path.exists(target) and os.path.getmtime(target) >= source_mtime:
+                continue
+            with open(target, "wb") as f:
+                f.write(compress(content))
+
+    def url_for(self, path: str) -> str:
+        """Return the content-hashed URL for a static file path"""
+        path = path.lstrip("/")
+        digest = self.hashes.get(path)
+        url = f"{self.url_prefix}/{path}"
+        return f"{url}?v={digest}" if digest else url
+
+    def rewrite_html(self, html: str) -> str:
+        """Point every /static reference in an HTML document at its hashed URL"""
+        pattern = re.compile(rf'(["\']){re.escape(self.url_prefix)}/([^"\'?#]+)\1')
+        return pattern.sub(lambda m: f"{m.group(1)}{self.url_for(m.group(2))}{m.group(1)}", html)
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that serves precompressed variants and sets Cache-Control"""
+
+    def _accepted_encodings(self, scope: Scope) -> list:
+        accept = Headers(scope=scope).get("accept-encoding", "")
+        accepted = [token.split(";")[0].strip().lower() for token in accept.split(",")]
+        encodings = []
+        if brotli is not None and "br" in accepted:
+            encodings.append(("br", ".br"))
+        if "gzip" in accepted:
+            encodings.append(("gzip", ".gz"))
+        return encodings
+
+    async def _precompressed_response(self, path: str, scope: Scope) -> Optional[Response]:
+        if scope["method"] not in ("GET", "HEAD") or not path.endswith(COMPRESSIBLE_EXTENSIONS):
+            return None
+
+        for encoding, suffix in self._accepted_encodings(scope):
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result and stat.S_ISREG(stat_result.st_mode):
+                response = self.file_response(full_path, stat_result, scope)
+                media_type, _ = mimetypes.guess_type(path)
+                if media_type and response.status_code == 200:
+                    response.headers["content-type"] = media_type
+                response.headers["content-encoding"] = encoding
+                response.headers["vary"] = "Accept-Encoding"
+                return response
+        return None
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        if response.status_code in (200, 304):
+            query = scope.get("query_string", b"").decode()
+            versioned = any(part.startswith("v=") for part in query.split("&"))
+            response.headers["cache-control"] = (
+                IMMUTABLE_CACHE_CONTROL if versioned else REVALIDATE_CACHE_CONTROL
+            )
+        return response
+
+
+static_manifest = StaticAssetManifest()
@@ -1,6 +1,13 @@
 from tavily import TavilyClient
 from typing import List, Dict, Any, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait
+from src.services.deadline import Deadline
+from src.services.profiler import profile_stage
+from src.logger import get_logger
+import contextvars
+
+
+logger = get_logger(__name__)
 
 
 class TavilySearchService:
@@ -20,41 +27,59 @@ class TavilySearchService:
     def _execute_search(self, query: str) -> Dict[str, Any]:
         """Execute a single search query against Tavily API"""
         try:
-            results = self.client.search(
-                query=query,
-                max_results=5,
-                include_answer=True
-            )
-            print(f"[SEARCH] Query: '{query}' - Found results")
+            with profile_stage("search"):
+                results = self.client.search(
+                    query=query,
+                    max_results=5,
+                    include_answer=True
+                )
+            logger.debug("Search query completed", extra={"query": query})
             return results
         except Exception as e:
-            print(f"[WARNING] Search query failed for '{query}': {str(e)}")
+            logger.warning("Search query failed: %s", e, extra={"query": query})
             return None
     
-    def search_company(self, company_name: str, company_link: Optional[str] = None) -> List[Dict[str, Any]]:
+    def search_company(self, company_name: str, company_link: Optional[str] = None,
+                       deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
         """Run multiple parallel searches to gather comprehensive company data with optimized query count"""
         queries = [
             f"{company_name} company overview products services leadership",
             f"{company_name} revenue financials news 2024 2025",
         ]
         
+        if deadline and deadline.expired():
+            logger.warning("Deadline reached before search started", extra={"company": company_name})
+            return []
+        
         all_results = []
         
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            futures = {executor.submit(self._execute_search, query): query for query in queries}
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._execute_search, query)
+                for query in queries
+            ]
+            done, not_done = wait(futures, timeout=deadline.remaining() if deadline else None)
             
-            for future in as_completed(futures):
+            for future in done:
                 result = future.result()
                 if result:
                     all_results.append(result)
+            
+            if not_done:
+                logger.warning("Deadline reached with %d searches still running", len(not_done))
+        finally:
+            # Don't hold the request on searches the deadline has already abandoned
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        print(f"[INFO] Completed {len(all_results)} searches in parallel")
+        logger.info("Completed %d searches in parallel", len(all_results))
         return all_results
     
-    def get_company_details(self, company_name: str, company_link: Optional[str] = None) -> Dict[str, Any]:
+    def get_company_details(self, company_name: str, company_link: Optional[str] = None,
+                            deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """Extract and aggregate company information from all search results into structured format"""
         try:
-            search_results = self.search_company(company_name, company_link)
+            search_results = self.search_company(company_name, company_link, deadline=deadline)
             
             raw_content_parts = []
             sources_list = []
@@ -99,7 +124,7 @@ class TavilySearchService:
             }
             
         except Exception as e:
-            print(f"[ERROR] Error in get_company_details: {str(e)}")
+            logger.error("Error in get_company_details: %s", e)
             return {
                 "company_name": company_name,
                 "search_results": None,
@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+
+import pytest
+from crewai import Agent
+
+from src.agents.crew import CompanyReportCrew
+from src.config import settings
+from src.services.deadline import Deadline, DeadlineExceeded
+from src.services.profiler import _thread_stages
+from src.services.stage_stats import StageStats
+
+
+ROLE_STAGES = {
+    "Company Research Analyst": "research",
+    "Data Structure Expert": "analysis",
+    "JSON Report Generator": "writer",
+}
+
+
+@pytest.fixture
+def crew(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return CompanyReportCrew(cohere_api_key="test-key")
+
+
+def stub_execute_task(failing_stage=None, seen_stages=None, seconds=0.0):
+    """Agent.execute_task stand-in: no LLM call, optionally slow or failing one stage"""
+    def execute_task(agent, task, context=None, tools=None):
+        stage = ROLE_STAGES[agent.role]
+        if seen_stages is not None:
+            seen_stages.append(_thread_stages.get(threading.get_ident()))
+        time.sleep(seconds)
+        if stage == failing_stage:
+            raise RuntimeError(f"{stage} failed")
+        return f"{stage} output"
+    return execute_task
+
+
+def test_writer_failure_keeps_research_and_analysis_checkpoints(crew, monkeypatch):
+    monkeypatch.setattr(Agent, "execute_task", stub_execute_task(failing_stage="writer"))
+
+    with pytest.raises(Exception, match="writer failed"):
+        crew.generate_report("Vodafone", "search content")
+
+    checkpoint_dir = os.path.join(crew.output_dir, "checkpoints")
+    stages = sorted(name.split("_")[0] for name in os.listdir(checkpoint_dir))
+    assert stages == ["analysis", "research"]
+
+    outputs = {}
+    for stage in ("research", "analysis"):
+        outputs[stage] = crew.checkpoints.get(stage, crew._stage_inputs(stage, "search content", outputs))
+    assert outputs == {"research": "research output", "analysis": "analysis output"}
+
+
+def test_rerun_resumes_from_checkpoints(crew, monkeypatch):
+    monkeypatch.setattr(Agent, "execute_task", stub_execute_task(failing_stage="writer"))
+    with pytest.raises(Exception):
+        crew.generate_report("Vodafone", "search content")
+
+    seen = []
+    monkeypatch.setattr(Agent, "execute_task", stub_execute_task(seen_stages=seen))
+    crew.report_dir = None
+    assert crew.generate_report("Vodafone", "search content") == "writer output"
+    assert seen == ["writer"]
+
+
+def test_each_stage_is_attributed_from_its_start(crew, monkeypatch):
+    seen = []
+    monkeypatch.setattr(Agent, "execute_task", stub_execute_task(seen_stages=seen))
+
+    crew.generate_report("Orange", "search content")
+
+    assert seen == ["research", "analysis", "writer"]
+
+
+def test_stage_too_close_to_deadline_is_not_started(crew, monkeypatch):
+    monkeypatch.setattr(settings, "deadline_writer_reserve_ms", 1500)
+    monkeypatch.setattr(settings, "deadline_margin_ms", 1000)
+    seen = []
+    monkeypatch.setattr(Agent, "execute_task", stub_execute_task(seen_stages=seen, seconds=1.0))
+
+    report = crew.generate_report("Orange", "search content", deadline=Deadline(3000))
+
+    # Analysis would start 0.5s before the upstream cutoff, inside the margin, so the writer
+    # starts straight away on the research output
+    assert report == "writer output"
+    assert seen == ["research", "writer"]
+    assert crew.analysis_output is None
+
+
+def test_abandoned_crew_stops_at_its_next_agent_step(crew):
+    deadline = Deadline(1000)
+    agent = crew.analysis_agent_class.create_agent()
+    task = crew.analysis_agent_class.create_task(agent, "research output")
+    upstream = crew._crew([agent], [task], deadline, {"analysis": time.perf_counter()})
+
+    upstream.step_callback(None)
+    deadline.cancel()
+    with pytest.raises(DeadlineExceeded, match="analysis"):
+        upstream.step_callback(None)
+
+
+def test_each_stage_gets_its_own_latency_row(crew, monkeypatch):
+    stats = StageStats()
+    monkeypatch.setattr("src.agents.crew.stage_stats", stats)
+    monkeypatch.setattr(Agent, "execute_task", stub_execute_task(seconds=0.05))
+
+    crew.generate_report("Orange", "search content")
+
+    rows = {row["stage"]: row for row in stats.snapshot()}
+    assert set(rows) == {"research", "analysis", "writer"}
+    for row in rows.values():
+        assert row["runs"] == 1
+        assert 0.05 <= row["total_latency_s"] < 0.5